@@ -5,6 +5,7 @@ Setup script for SOPS wrapper dependencies and configuration.
 
 import subprocess
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 
@@ -12,6 +13,7 @@ def install_dependencies():
     """Install required Python dependencies."""
     dependencies = [
         "PyYAML>=6.0",
+        "blake3>=0.4",
     ]
 
     print("Installing SOPS wrapper dependencies...")
@@ -28,6 +30,25 @@ def install_dependencies():
     return True
 
 
+def check_libyaml():
+    """Check that the wrapper's YAML loader uses the LibYAML C bindings."""
+    sys.path.insert(0, str(Path(__file__).parent))
+    try:
+        from sops_wrapper import _SafeLoader
+    except ImportError:
+        print("❌ PyYAML is not importable")
+        return False
+
+    if _SafeLoader.__name__ == "CSafeLoader":
+        print("✅ PyYAML LibYAML bindings are available")
+    else:
+        print("⚠️  PyYAML is using the pure-Python parser (slower)")
+        print("   Install libyaml and reinstall PyYAML to enable CSafeLoader:")
+        print("   pip install --force-reinstall --no-binary pyyaml PyYAML")
+
+    return True
+
+
 def make_executable():
     """Make the SOPS wrapper script executable."""
     script_path = Path(__file__).parent / "sops_wrapper.py"
@@ -86,8 +107,9 @@ if __name__ == "__main__":
             print(f"❌ Failed to create wrapper {link_name}: {e}")
 
 
+@lru_cache(maxsize=1)
 def verify_sops():
-    """Verify that SOPS is installed."""
+    """Verify that SOPS is installed; the probe runs once per process."""
     try:
         result = subprocess.run(
             ["sops", "--version"],
@@ -127,6 +149,11 @@ def main():
     if not install_dependencies():
         success = False
 
+    # Report the YAML parser even when an install failed; only a missing
+    # PyYAML fails setup, the pure-Python parser is just slower
+    if not check_libyaml():
+        success = False
+
     print()
 
     # Make script executable
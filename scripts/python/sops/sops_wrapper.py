@@ -11,17 +11,118 @@ This wrapper provides functionality to:
 """
 
 import argparse
+import asyncio
+import fnmatch
 import hashlib
+import json
 import logging
 import os
+import re
+import shutil
 import subprocess
 import sys
-import tempfile
+import weakref
+from collections.abc import Callable, Iterator
 from concurrent.futures import ThreadPoolExecutor
-from pathlib import Path
+from functools import lru_cache
+from pathlib import Path, PurePath
 
 import yaml
 
+# Prefer the LibYAML-backed loader when PyYAML was built with it;
+# setup_sops_wrapper.py imports this rather than repeating the check
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+# Hashes are only compared locally to detect content changes, so prefer
+# BLAKE3 (or BLAKE2b) over SHA256 for throughput
+try:
+    from blake3 import blake3 as _new_hasher
+except ImportError:
+    def _new_hasher():
+        return hashlib.blake2b(digest_size=32)
+
+# Directories never searched when looking for secrets files
+SKIP_DIRS = frozenset({".git", ".venv", "node_modules", "__pycache__"})
+
+# Sidecar file recording file state after each successful encryption
+ENCRYPT_CACHE_FILE = ".sops-cache.json"
+
+# Characters that require an .env value to be quoted
+_ENV_QUOTE_RE = re.compile(r"[ \"'$`\\]")
+
+
+@lru_cache(maxsize=1)
+def _sops_executable() -> str:
+    """Resolve the SOPS binary once so each spawn skips the PATH lookup."""
+    return shutil.which("sops") or "sops"
+
+
+@lru_cache(maxsize=1)
+def _sops_available() -> bool:
+    """Probe `sops --version` once per process; every wrapper reuses the result."""
+    try:
+        result = subprocess.run(
+            [_sops_executable(), "--version"],
+            capture_output=True,
+            timeout=10
+        )
+        return result.returncode == 0
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return False
+
+
+@lru_cache(maxsize=512)
+def _hash_file(path: str, mtime_ns: int, size: int) -> str:
+    """Hash file content; mtime_ns and size only key the cache entry."""
+    # file_digest streams through a reused buffer with readinto, avoiding
+    # a new bytes object per chunk
+    with open(path, "rb", buffering=0) as f:
+        return hashlib.file_digest(f, _new_hasher).hexdigest()
+
+
+def _hash_bytes(data: bytes) -> str:
+    """Hash in-memory content with the same digest as _hash_file."""
+    hasher = _new_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def _inode_of(path: Path) -> int:
+    """Return the inode number of path, or 0 if it can no longer be stat'ed."""
+    try:
+        return path.stat().st_ino
+    except OSError:
+        return 0
+
+
+def _enc_path(dec_file: Path) -> Path:
+    """Return the encrypted counterpart of a decrypted secrets file."""
+    return dec_file.with_name(dec_file.name.replace(".dec.", ".enc."))
+
+
+def _dec_path(enc_file: Path) -> Path:
+    """Return the decrypted counterpart of an encrypted secrets file."""
+    return enc_file.with_name(enc_file.name.replace(".enc.", ".dec."))
+
+
+def _maybe_quote(value: str) -> str:
+    """Quote an .env value if it contains spaces or special characters."""
+    return f'"{value}"' if _ENV_QUOTE_RE.search(value) else value
+
+
+@lru_cache(maxsize=1024)
+def _is_valid_yaml_file(path: str, mtime_ns: int, size: int) -> bool:
+    """Parse file as YAML; mtime_ns and size only key the cache entry."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            yaml.load(f, Loader=_SafeLoader)  # nosec B506
+        return True
+    except yaml.YAMLError:
+        return False
+
 
 class SOPSWrapper:
     """Python wrapper for SOPS encryption/decryption operations."""
@@ -45,6 +146,18 @@ class SOPSWrapper:
         if not self._check_sops_available():
             raise RuntimeError("SOPS is not installed or not in PATH")
 
+        # Worker pool shared by every batch action until cleanup()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sops")
+
+        # Sidecar encryption caches loaded per directory, and those needing a save
+        self._encrypt_caches: dict[Path, dict[str, dict]] = {}
+        self._dirty_encrypt_caches: set[Path] = set()
+
+        # Per event loop semaphores bounding concurrent SOPS runs for the async API
+        self._async_slots: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+            weakref.WeakKeyDictionary()
+        )
+
     def _setup_logging(self) -> logging.Logger:
         """Set up logging configuration."""
         logging.basicConfig(
@@ -58,41 +171,36 @@ class SOPSWrapper:
 
     def _check_sops_available(self) -> bool:
         """Check if SOPS command is available."""
+        return _sops_available()
+
+    def _stat(self, file_path: Path) -> os.stat_result | None:
+        """Stat file, returning None if it does not exist or cannot be accessed."""
         try:
-            result = subprocess.run(
-                ["sops", "--version"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            return False
+            return os.stat(file_path)
+        except OSError:
+            return None
 
-    def _is_file_not_empty(self, file_path: Path) -> bool:
-        """Check if file exists and is not empty."""
-        return file_path.exists() and file_path.stat().st_size > 0
+    def _is_file_not_empty(self, file_path: Path, st: os.stat_result | None = None) -> bool:
+        """Check if file exists and is not empty, reusing st when already known."""
+        if st is None:
+            st = self._stat(file_path)
+        return st is not None and st.st_size > 0
 
-    def _is_valid_yaml(self, file_path: Path) -> bool:
+    def _is_valid_yaml(self, file_path: Path, st: os.stat_result | None = None) -> bool:
         """Validate if file contains valid YAML content."""
-        if not self._is_file_not_empty(file_path):
-            return False
-
-        try:
-            with open(file_path, encoding="utf-8") as f:
-                yaml.safe_load(f)
-            return True
-        except yaml.YAMLError:
+        if st is None:
+            st = self._stat(file_path)
+        if not self._is_file_not_empty(file_path, st):
             return False
 
-    def _get_file_hash(self, file_path: Path) -> str | None:
-        """Get SHA256 hash of file content."""
-        if not file_path.exists():
-            return None
+        return _is_valid_yaml_file(str(file_path), st.st_mtime_ns, st.st_size)
 
+    def _get_file_hash(self, file_path: Path, st: os.stat_result | None = None) -> str | None:
+        """Get content hash of file, cached by (path, mtime, size)."""
         try:
-            with open(file_path, "rb") as f:
-                return hashlib.sha256(f.read()).hexdigest()
+            if st is None:
+                st = os.stat(file_path)
+            return _hash_file(str(file_path), st.st_mtime_ns, st.st_size)
         except OSError:
             return None
 
@@ -103,55 +211,155 @@ class SOPSWrapper:
         Returns:
             Tuple of (should_encrypt: bool, reason: str)
         """
+        should_encrypt, reason = self._cheap_should_encrypt(dec_file, enc_file)
+        if should_encrypt is None:
+            return self._expensive_verify(dec_file, enc_file)
+
+        return should_encrypt, reason
+
+    def _cheap_should_encrypt(self, dec_file: Path, enc_file: Path) -> tuple[bool | None, str]:
+        """
+        Decide whether file should be encrypted using local file checks only.
+
+        Returns:
+            Tuple of (should_encrypt: bool | None, reason: str), where None means
+            the encrypted content must be decrypted and compared
+        """
+        # Each file is stat'ed once and the result reused by every check below
+        dec_st = self._stat(dec_file)
+        enc_st = self._stat(enc_file)
+
         # Check if decrypted file is valid
-        if not self._is_valid_yaml(dec_file):
+        if not self._is_valid_yaml(dec_file, dec_st):
             return False, "source file is empty or invalid YAML"
 
         # No encrypted file exists
-        if not enc_file.exists():
+        if enc_st is None:
             return True, "no encrypted file exists"
 
         # Encrypted file is empty
-        if not self._is_file_not_empty(enc_file):
+        if not self._is_file_not_empty(enc_file, enc_st):
             return True, "encrypted file is empty"
 
+        # Nothing changed since the last successful encryption
+        if self._matches_encrypt_cache(dec_file, enc_file, dec_st, enc_st):
+            return False, "unchanged since last encryption"
+
         # Check if source is newer than encrypted file
-        if dec_file.stat().st_mtime > enc_file.stat().st_mtime:
+        if dec_st.st_mtime > enc_st.st_mtime:
             return True, "source file is newer"
 
-        # Check if content has changed using hash comparison
-        dec_hash = self._get_file_hash(dec_file)
+        return None, "content comparison required"
+
+    def _load_encrypt_cache(self, directory: Path) -> dict[str, dict]:
+        """Load the sidecar encryption cache for a directory."""
+        cache = self._encrypt_caches.get(directory)
+        if cache is None:
+            try:
+                cache = json.loads((directory / ENCRYPT_CACHE_FILE).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                cache = {}
+            if not isinstance(cache, dict):
+                cache = {}
+            # Older caches stored a hash of the plaintext; purge it on the next save
+            for entry in cache.values():
+                if isinstance(entry, dict) and entry.pop("plain_hash", None) is not None:
+                    self._dirty_encrypt_caches.add(directory)
+            self._encrypt_caches[directory] = cache
+        return cache
+
+    def _save_encrypt_caches(self) -> None:
+        """Write sidecar encryption caches updated since the last save."""
+        for directory in self._dirty_encrypt_caches:
+            cache_file = directory / ENCRYPT_CACHE_FILE
+            try:
+                # Owner-only from creation; fchmod also tightens an existing file
+                fd = os.open(cache_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    os.fchmod(f.fileno(), 0o600)
+                    f.write(json.dumps(self._encrypt_caches[directory], indent=2, sort_keys=True))
+            except OSError as e:
+                self.logger.warning(f"Failed to write encryption cache {cache_file}: {e}")
+        self._dirty_encrypt_caches.clear()
+
+    def _snapshot_source(self, dec_file: Path) -> dict | None:
+        """Capture source file state before it is handed to SOPS for encryption."""
+        st = self._stat(dec_file)
+        if st is None:
+            return None
+        return {"plain_mtime_ns": st.st_mtime_ns, "plain_size": st.st_size}
+
+    def _record_encryption(self, enc_file: Path, snapshot: dict | None) -> None:
+        """Remember source and encrypted file state after a successful encryption."""
+        if snapshot is None:
+            return
+        st = self._stat(enc_file)
+        if st is None:
+            return
+        self._load_encrypt_cache(enc_file.parent)[enc_file.name] = {
+            **snapshot, "enc_mtime_ns": st.st_mtime_ns, "enc_size": st.st_size
+        }
+        self._dirty_encrypt_caches.add(enc_file.parent)
+
+    def _matches_encrypt_cache(
+        self,
+        dec_file: Path,
+        enc_file: Path,
+        dec_st: os.stat_result | None = None,
+        enc_st: os.stat_result | None = None,
+    ) -> bool:
+        """Check if both files are unchanged since their recorded encryption."""
+        entry = self._load_encrypt_cache(enc_file.parent).get(enc_file.name)
+        if not isinstance(entry, dict):
+            return False
+
+        if dec_st is None:
+            dec_st = self._stat(dec_file)
+        if enc_st is None:
+            enc_st = self._stat(enc_file)
+        if dec_st is None or enc_st is None:
+            return False
 
+        # The encrypted file must be exactly the one we wrote
+        if (enc_st.st_mtime_ns, enc_st.st_size) != (entry.get("enc_mtime_ns"), entry.get("enc_size")):
+            return False
+
+        # Source untouched; anything else is left to the mtime and SOPS checks
+        return (dec_st.st_mtime_ns, dec_st.st_size) == (entry.get("plain_mtime_ns"), entry.get("plain_size"))
+
+    def _expensive_verify(self, dec_file: Path, enc_file: Path) -> tuple[bool, str]:
+        """
+        Decrypt the encrypted file with SOPS and compare it with the source.
+
+        Returns:
+            Tuple of (should_encrypt: bool, reason: str)
+        """
         # Try to decrypt and compare with original
         try:
-            temp_file = self._decrypt_to_temp(enc_file)
-            if temp_file:
-                enc_content_hash = self._get_file_hash(temp_file)
-                temp_file.unlink()  # Clean up
-
-                if dec_hash != enc_content_hash:
-                    return True, "content has changed"
+            decrypted = self._decrypt_to_bytes(enc_file)
         except Exception:
             # If we can't decrypt for comparison, encrypt to be safe
             return True, "unable to verify encrypted content"
 
+        return self._compare_decrypted(dec_file, decrypted)
+
+    def _compare_decrypted(self, dec_file: Path, decrypted: bytes | None) -> tuple[bool, str]:
+        """Compare decrypted SOPS output with the source file using hashes."""
+        if decrypted is not None and _hash_bytes(decrypted) != self._get_file_hash(dec_file):
+            return True, "content has changed"
+
         return False, "no changes detected"
 
-    def _decrypt_to_temp(self, enc_file: Path) -> Path | None:
-        """Decrypt file to temporary location for comparison."""
+    def _decrypt_to_bytes(self, enc_file: Path) -> bytes | None:
+        """Decrypt file in memory for comparison."""
         try:
-            with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".yaml") as temp_f:
-                temp_path = Path(temp_f.name)
-
             result = subprocess.run([
-                "sops", "--input-type", "yaml", "--output-type", "yaml",
+                _sops_executable(), "--input-type", "yaml", "--output-type", "yaml",
                 "-d", str(enc_file)
-            ], capture_output=True, text=True, timeout=30)
+            ], capture_output=True, timeout=30)
 
             if result.returncode == 0:
-                with open(temp_path, "w", encoding="utf-8") as f:
-                    f.write(result.stdout)
-                return temp_path
+                return result.stdout
 
         except Exception as e:
             self.logger.debug(f"Failed to decrypt {enc_file} for comparison: {e}")
@@ -163,20 +371,10 @@ class SOPSWrapper:
         try:
             # Run SOPS updatekeys command
             result = subprocess.run([
-                "sops", "updatekeys", "--yes", str(enc_file)
-            ], capture_output=True, text=True, timeout=60)
-
-            if result.returncode != 0:
-                self.logger.error(f"SOPS updatekeys failed for {enc_file}: {result.stderr}")
-                return False
+                _sops_executable(), "updatekeys", "--yes", str(enc_file)
+            ], capture_output=True, timeout=60)
 
-            # Verify encrypted file is still valid and not empty
-            if not self._is_file_not_empty(enc_file):
-                self.logger.error(f"Updatekeys created empty file: {enc_file}")
-                return False
-
-            self.logger.info(f"✅ Successfully updated keys: {enc_file}")
-            return True
+            return self._handle_updatekeys_result(enc_file, result)
 
         except subprocess.TimeoutExpired:
             self.logger.error(f"Updatekeys timeout for {enc_file}")
@@ -185,6 +383,20 @@ class SOPSWrapper:
             self.logger.error(f"Updatekeys error for {enc_file}: {e}")
             return False
 
+    def _handle_updatekeys_result(self, enc_file: Path, result: subprocess.CompletedProcess) -> bool:
+        """Check the outcome of a SOPS updatekeys run."""
+        if result.returncode != 0:
+            self.logger.error(f"SOPS updatekeys failed for {enc_file}: {result.stderr.decode(errors='replace')}")
+            return False
+
+        # Verify encrypted file is still valid and not empty
+        if not self._is_file_not_empty(enc_file):
+            self.logger.error(f"Updatekeys created empty file: {enc_file}")
+            return False
+
+        self.logger.info(f"✅ Successfully updated keys: {enc_file}")
+        return True
+
     def _encrypt_file(self, dec_file: Path, enc_file: Path, update_keys: bool = False) -> bool:
         """Encrypt a single file using SOPS."""
         try:
@@ -193,30 +405,119 @@ class SOPSWrapper:
 
             # Run SOPS encryption
             result = subprocess.run([
-                "sops", "--input-type", "yaml", "--output-type", "yaml",
+                _sops_executable(), "--input-type", "yaml", "--output-type", "yaml",
                 "-e", str(dec_file)
-            ], capture_output=True, text=True, timeout=60)
+            ], capture_output=True, timeout=60)
 
-            if result.returncode != 0:
-                self.logger.error(f"SOPS encryption failed for {dec_file}: {result.stderr}")
+            if not self._handle_encrypt_result(dec_file, enc_file, result):
                 return False
 
-            # Write encrypted content to file
-            with open(enc_file, "w", encoding="utf-8") as f:
-                f.write(result.stdout)
+            # Update keys if requested
+            if update_keys:
+                self.logger.info(f"Updating keys for: {enc_file}")
+                if not self._updatekeys_file(enc_file):
+                    self.logger.warning(f"Key update failed for {enc_file}, but encryption was successful")
+                    return True  # Encryption was successful even if key update failed
 
-            # Verify encrypted file was created and is not empty
-            if not self._is_file_not_empty(enc_file):
-                self.logger.error(f"Encryption created empty file: {enc_file}")
-                enc_file.unlink(missing_ok=True)  # Clean up empty file
-                return False
+            return True
 
-            self.logger.info(f"✅ Successfully encrypted: {dec_file} -> {enc_file}")
+        except subprocess.TimeoutExpired:
+            self.logger.error(f"Encryption timeout for {dec_file}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Encryption error for {dec_file}: {e}")
+            return False
+
+    def _handle_encrypt_result(self, dec_file: Path, enc_file: Path, result: subprocess.CompletedProcess) -> bool:
+        """Write the output of a SOPS encryption run and verify it."""
+        if result.returncode != 0:
+            self.logger.error(f"SOPS encryption failed for {dec_file}: {result.stderr.decode(errors='replace')}")
+            return False
+
+        # Write encrypted content to file
+        with open(enc_file, "wb") as f:
+            f.write(result.stdout)
+
+        # Verify encrypted file was created and is not empty
+        if not self._is_file_not_empty(enc_file):
+            self.logger.error(f"Encryption created empty file: {enc_file}")
+            enc_file.unlink(missing_ok=True)  # Clean up empty file
+            return False
+
+        self.logger.info(f"✅ Successfully encrypted: {dec_file} -> {enc_file}")
+        return True
+
+    def _sops_slots(self) -> asyncio.Semaphore:
+        """Get the semaphore bounding concurrent SOPS runs on the current event loop."""
+        loop = asyncio.get_running_loop()
+        slots = self._async_slots.get(loop)
+        if slots is None:
+            slots = self._async_slots[loop] = asyncio.Semaphore(self.max_workers)
+        return slots
+
+    async def _arun_sops(self, *args: str, timeout: float) -> subprocess.CompletedProcess:
+        """Run SOPS as an asyncio subprocess, mirroring subprocess.run's result."""
+        cmd = [_sops_executable(), *args]
+        async with self._sops_slots():
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+            except TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise subprocess.TimeoutExpired(cmd, timeout) from None
+
+        return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+    async def _aexpensive_verify(self, dec_file: Path, enc_file: Path) -> tuple[bool, str]:
+        """Asynchronous counterpart of _expensive_verify."""
+        decrypted = None
+        try:
+            result = await self._arun_sops(
+                "--input-type", "yaml", "--output-type", "yaml", "-d", str(enc_file), timeout=30
+            )
+            if result.returncode == 0:
+                decrypted = result.stdout
+        except Exception as e:
+            self.logger.debug(f"Failed to decrypt {enc_file} for comparison: {e}")
+
+        # Hashing the source reads it from disk; keep it off the loop
+        return await asyncio.to_thread(self._compare_decrypted, dec_file, decrypted)
+
+    async def _aupdatekeys_file(self, enc_file: Path) -> bool:
+        """Asynchronous counterpart of _updatekeys_file."""
+        try:
+            result = await self._arun_sops("updatekeys", "--yes", str(enc_file), timeout=60)
+            # Checking the result stats the file; keep it off the loop
+            return await asyncio.to_thread(self._handle_updatekeys_result, enc_file, result)
+
+        except subprocess.TimeoutExpired:
+            self.logger.error(f"Updatekeys timeout for {enc_file}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Updatekeys error for {enc_file}: {e}")
+            return False
+
+    async def _aencrypt_file(self, dec_file: Path, enc_file: Path, update_keys: bool = False) -> bool:
+        """Asynchronous counterpart of _encrypt_file."""
+        try:
+            # Ensure output directory exists
+            await asyncio.to_thread(enc_file.parent.mkdir, parents=True, exist_ok=True)
+
+            result = await self._arun_sops(
+                "--input-type", "yaml", "--output-type", "yaml", "-e", str(dec_file), timeout=60
+            )
+
+            # Writing and checking the output is blocking file I/O; keep it off the loop
+            if not await asyncio.to_thread(self._handle_encrypt_result, dec_file, enc_file, result):
+                return False
 
             # Update keys if requested
             if update_keys:
                 self.logger.info(f"Updating keys for: {enc_file}")
-                if not self._updatekeys_file(enc_file):
+                if not await self._aupdatekeys_file(enc_file):
                     self.logger.warning(f"Key update failed for {enc_file}, but encryption was successful")
                     return True  # Encryption was successful even if key update failed
 
@@ -237,26 +538,50 @@ class SOPSWrapper:
 
             # Run SOPS decryption
             result = subprocess.run([
-                "sops", "--input-type", "yaml", "--output-type", "yaml",
+                _sops_executable(), "--input-type", "yaml", "--output-type", "yaml",
                 "-d", str(enc_file)
-            ], capture_output=True, text=True, timeout=60)
+            ], capture_output=True, timeout=60)
 
-            if result.returncode != 0:
-                self.logger.error(f"SOPS decryption failed for {enc_file}: {result.stderr}")
-                return False
+            return self._handle_decrypt_result(enc_file, dec_file, result)
+
+        except subprocess.TimeoutExpired:
+            self.logger.error(f"Decryption timeout for {enc_file}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Decryption error for {enc_file}: {e}")
+            return False
 
-            # Write decrypted content to file
-            with open(dec_file, "w", encoding="utf-8") as f:
-                f.write(result.stdout)
+    def _handle_decrypt_result(self, enc_file: Path, dec_file: Path, result: subprocess.CompletedProcess) -> bool:
+        """Write the output of a SOPS decryption run and verify it."""
+        if result.returncode != 0:
+            self.logger.error(f"SOPS decryption failed for {enc_file}: {result.stderr.decode(errors='replace')}")
+            return False
 
-            # Verify decrypted file is valid YAML
-            if not self._is_valid_yaml(dec_file):
-                self.logger.error(f"Decryption created invalid YAML: {dec_file}")
-                dec_file.unlink(missing_ok=True)  # Clean up invalid file
-                return False
+        # Write decrypted content to file
+        with open(dec_file, "wb") as f:
+            f.write(result.stdout)
 
-            self.logger.info(f"✅ Successfully decrypted: {enc_file} -> {dec_file}")
-            return True
+        # Verify decrypted file is valid YAML
+        if not self._is_valid_yaml(dec_file):
+            self.logger.error(f"Decryption created invalid YAML: {dec_file}")
+            dec_file.unlink(missing_ok=True)  # Clean up invalid file
+            return False
+
+        self.logger.info(f"✅ Successfully decrypted: {enc_file} -> {dec_file}")
+        return True
+
+    async def _adecrypt_file(self, enc_file: Path, dec_file: Path) -> bool:
+        """Asynchronous counterpart of _decrypt_file."""
+        try:
+            # Ensure output directory exists
+            await asyncio.to_thread(dec_file.parent.mkdir, parents=True, exist_ok=True)
+
+            result = await self._arun_sops(
+                "--input-type", "yaml", "--output-type", "yaml", "-d", str(enc_file), timeout=60
+            )
+
+            # Writing and validating the output is blocking file I/O; keep it off the loop
+            return await asyncio.to_thread(self._handle_decrypt_result, enc_file, dec_file, result)
 
         except subprocess.TimeoutExpired:
             self.logger.error(f"Decryption timeout for {enc_file}")
@@ -266,11 +591,84 @@ class SOPSWrapper:
             return False
 
     def find_files(self, pattern: str, base_dir: Path | None = None) -> list[Path]:
-        """Find files matching the given pattern."""
+        """
+        Find files matching the given pattern.
+
+        Results are ordered by inode number rather than by name, so batch
+        workers visit files roughly in on-disk order; callers must not rely
+        on alphabetical ordering.
+        """
         if base_dir is None:
             base_dir = Path.cwd()
 
-        return sorted(base_dir.rglob(pattern))
+        parts = PurePath(pattern).parts
+        if "**" in parts:
+            # Recursive wildcards need full pathlib globbing semantics
+            return sorted(base_dir.rglob(pattern), key=_inode_of)
+
+        entries = sorted(self._walk(base_dir, parts), key=os.DirEntry.inode)
+        return [Path(entry.path) for entry in entries]
+
+    def _walk(self, base_dir: Path, parts: tuple[str, ...]) -> Iterator[os.DirEntry]:
+        """
+        Yield files below base_dir whose trailing path components match parts.
+
+        Equivalent to Path.rglob for patterns without "**", but built on
+        os.scandir so each entry costs a single directory read, and
+        directories in SKIP_DIRS are never descended into.
+        """
+        matchers = [re.compile(fnmatch.translate(part)).match for part in parts]
+        depth = len(matchers) - 1
+
+        # Each stack item carries the names of its last `depth` parent directories
+        stack: list[tuple[str, tuple[str, ...]]] = [(os.fspath(base_dir), ())]
+        while stack:
+            directory, parents = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRS:
+                                stack.append((entry.path, (*parents, entry.name)[-depth:] if depth else ()))
+                            continue
+
+                        if not matchers[-1](entry.name):
+                            continue
+                        if depth and (
+                            len(parents) < depth
+                            or not all(match(name) for match, name in zip(matchers, parents, strict=False))
+                        ):
+                            continue
+                        yield entry
+            except OSError as e:
+                self.logger.debug(f"Skipping unreadable directory {directory}: {e}")
+
+    def _run_batch(
+        self,
+        items: list[tuple],
+        worker_fn: Callable[..., bool],
+        on_success: Callable[..., None] | None = None,
+    ) -> int:
+        """
+        Run worker_fn(*item) for every item on the shared worker pool.
+
+        All items are submitted before any result is awaited, so a whole wave
+        of work is scheduled at once. on_success, if given, is called with the
+        item's arguments in submission order for each item whose worker
+        returned a truthy result.
+
+        Returns:
+            Number of items whose worker succeeded
+        """
+        futures = [(item, self._executor.submit(worker_fn, *item)) for item in items]
+
+        successes = 0
+        for item, future in futures:
+            if future.result():
+                successes += 1
+                if on_success is not None:
+                    on_success(*item)
+        return successes
 
     def encrypt_files(self, pattern: str = "*.dec.yaml", base_dir: Path | None = None, update_keys: bool = False) -> int:
         """
@@ -292,33 +690,41 @@ class SOPSWrapper:
 
         self.logger.info(f"Found {len(dec_files)} files to process")
 
-        # Process files in parallel
-        successful_encryptions = 0
-
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = []
-
-            for dec_file in dec_files:
-                # Generate encrypted filename
-                enc_filename = dec_file.name.replace(".dec.", ".enc.")
-                enc_file = dec_file.parent / enc_filename
-
-                # Check if encryption is needed
-                should_encrypt, reason = self._should_encrypt(dec_file, enc_file)
-
-                if should_encrypt:
-                    self.logger.info(f"Encrypting: {dec_file} -> {enc_file} ({reason})")
-                    future = executor.submit(self._encrypt_file, dec_file, enc_file, update_keys)
-                    futures.append(future)
-                else:
-                    self.logger.info(f"Skipping: {dec_file} ({reason})")
+        # Check if encryption is needed; files the cheap checks can't decide
+        # are verified via SOPS decryption, all dispatched to the pool at once
+        decisions = {}
+        pending = {}
+        for dec_file in dec_files:
+            enc_file = _enc_path(dec_file)
+            should_encrypt, reason = self._cheap_should_encrypt(dec_file, enc_file)
+            if should_encrypt is None:
+                pending[dec_file] = (enc_file, self._executor.submit(self._expensive_verify, dec_file, enc_file))
+            else:
+                decisions[dec_file] = (enc_file, should_encrypt, reason)
+
+        for dec_file, (enc_file, future) in pending.items():
+            decisions[dec_file] = (enc_file, *future.result())
+
+        jobs = []
+        snapshots = {}
+        for dec_file in dec_files:
+            enc_file, should_encrypt, reason = decisions[dec_file]
+            if should_encrypt:
+                self.logger.info(f"Encrypting: {dec_file} -> {enc_file} ({reason})")
+                snapshots[enc_file] = self._snapshot_source(dec_file)
+                jobs.append((dec_file, enc_file, update_keys))
+            else:
+                self.logger.info(f"Skipping: {dec_file} ({reason})")
+
+        successful_encryptions = self._run_batch(
+            jobs,
+            self._encrypt_file,
+            on_success=lambda _dec_file, enc_file, _update_keys: self._record_encryption(enc_file, snapshots[enc_file]),
+        )
 
-            # Wait for all encryptions to complete
-            for future in futures:
-                if future.result():
-                    successful_encryptions += 1
+        self._save_encrypt_caches()
 
-        self.logger.info(f"Encryption completed. {successful_encryptions}/{len(futures)} files encrypted successfully")
+        self.logger.info(f"Encryption completed. {successful_encryptions}/{len(jobs)} files encrypted successfully")
         return successful_encryptions
 
     def decrypt_files(self, pattern: str = "*.enc.yaml", base_dir: Path | None = None) -> int:
@@ -340,25 +746,13 @@ class SOPSWrapper:
 
         self.logger.info(f"Found {len(enc_files)} files to decrypt")
 
-        # Process files in parallel
-        successful_decryptions = 0
-
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = []
-
-            for enc_file in enc_files:
-                # Generate decrypted filename
-                dec_filename = enc_file.name.replace(".enc.", ".dec.")
-                dec_file = enc_file.parent / dec_filename
+        jobs = []
+        for enc_file in enc_files:
+            dec_file = _dec_path(enc_file)
+            self.logger.info(f"Decrypting: {enc_file} -> {dec_file}")
+            jobs.append((enc_file, dec_file))
 
-                self.logger.info(f"Decrypting: {enc_file} -> {dec_file}")
-                future = executor.submit(self._decrypt_file, enc_file, dec_file)
-                futures.append(future)
-
-            # Wait for all decryptions to complete
-            for future in futures:
-                if future.result():
-                    successful_decryptions += 1
+        successful_decryptions = self._run_batch(jobs, self._decrypt_file)
 
         self.logger.info(f"Decryption completed. {successful_decryptions}/{len(enc_files)} files decrypted successfully")
         return successful_decryptions
@@ -382,41 +776,172 @@ class SOPSWrapper:
 
         self.logger.info(f"Found {len(enc_files)} encrypted files to update keys")
 
-        # Process files in parallel
-        successful_updates = 0
+        for enc_file in enc_files:
+            self.logger.info(f"Updating keys: {enc_file}")
+
+        successful_updates = self._run_batch([(enc_file,) for enc_file in enc_files], self._updatekeys_file)
+
+        self.logger.info(f"Key update completed. {successful_updates}/{len(enc_files)} files updated successfully")
+        return successful_updates
+
+    async def aencrypt_files(self, pattern: str = "*.dec.yaml", base_dir: Path | None = None, update_keys: bool = False) -> int:
+        """
+        Encrypt all files matching the pattern using asyncio subprocesses.
+
+        Same decisions as encrypt_files, but SOPS runs on the event loop with
+        at most max_workers processes in flight instead of on the worker pool.
+        File discovery, the stat/parse/hash checks and cache updates are
+        blocking I/O and run in threads via asyncio.to_thread.
+
+        Args:
+            pattern: File pattern to match (default: *.dec.yaml)
+            base_dir: Base directory to search (default: current directory)
+            update_keys: Whether to update keys after encryption (default: False)
+
+        Returns:
+            Number of files successfully encrypted
+        """
+        dec_files = await asyncio.to_thread(self.find_files, pattern, base_dir)
+
+        if not dec_files:
+            self.logger.info(f"No files found matching pattern: {pattern}")
+            return 0
+
+        self.logger.info(f"Found {len(dec_files)} files to process")
+
+        # Check if encryption is needed, verifying undecided files concurrently
+        decisions = {}
+        pending = []
+        enc_files = [_enc_path(dec_file) for dec_file in dec_files]
+        cheap = await asyncio.gather(
+            *(
+                asyncio.to_thread(self._cheap_should_encrypt, dec_file, enc_file)
+                for dec_file, enc_file in zip(dec_files, enc_files, strict=True)
+            )
+        )
+        for dec_file, enc_file, (should_encrypt, reason) in zip(dec_files, enc_files, cheap, strict=True):
+            if should_encrypt is None:
+                pending.append((dec_file, enc_file))
+            else:
+                decisions[dec_file] = (enc_file, should_encrypt, reason)
+
+        verified = await asyncio.gather(*(self._aexpensive_verify(dec_file, enc_file) for dec_file, enc_file in pending))
+        for (dec_file, enc_file), result in zip(pending, verified, strict=True):
+            decisions[dec_file] = (enc_file, *result)
+
+        to_encrypt = []
+        for dec_file in dec_files:
+            enc_file, should_encrypt, reason = decisions[dec_file]
+            if should_encrypt:
+                self.logger.info(f"Encrypting: {dec_file} -> {enc_file} ({reason})")
+                to_encrypt.append((dec_file, enc_file))
+            else:
+                self.logger.info(f"Skipping: {dec_file} ({reason})")
+
+        # Snapshot every source before its encryption starts
+        snapshots = await asyncio.gather(
+            *(asyncio.to_thread(self._snapshot_source, dec_file) for dec_file, _ in to_encrypt)
+        )
+        encrypted = [(enc_file, snapshot) for (_, enc_file), snapshot in zip(to_encrypt, snapshots, strict=True)]
+        jobs = [self._aencrypt_file(dec_file, enc_file, update_keys) for dec_file, enc_file in to_encrypt]
+
+        # Wait for all encryptions to complete
+        successful_encryptions = 0
+        for (enc_file, snapshot), success in zip(encrypted, await asyncio.gather(*jobs), strict=True):
+            if success:
+                successful_encryptions += 1
+                await asyncio.to_thread(self._record_encryption, enc_file, snapshot)
+
+        await asyncio.to_thread(self._save_encrypt_caches)
+
+        self.logger.info(f"Encryption completed. {successful_encryptions}/{len(jobs)} files encrypted successfully")
+        return successful_encryptions
+
+    async def adecrypt_files(self, pattern: str = "*.enc.yaml", base_dir: Path | None = None) -> int:
+        """
+        Decrypt all files matching the pattern using asyncio subprocesses.
+
+        Args:
+            pattern: File pattern to match (default: *.enc.yaml)
+            base_dir: Base directory to search (default: current directory)
+
+        Returns:
+            Number of files successfully decrypted
+        """
+        enc_files = await asyncio.to_thread(self.find_files, pattern, base_dir)
+
+        if not enc_files:
+            self.logger.info(f"No files found matching pattern: {pattern}")
+            return 0
+
+        self.logger.info(f"Found {len(enc_files)} files to decrypt")
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = []
+        jobs = []
+        for enc_file in enc_files:
+            dec_file = _dec_path(enc_file)
+            self.logger.info(f"Decrypting: {enc_file} -> {dec_file}")
+            jobs.append(self._adecrypt_file(enc_file, dec_file))
 
-            for enc_file in enc_files:
-                self.logger.info(f"Updating keys: {enc_file}")
-                future = executor.submit(self._updatekeys_file, enc_file)
-                futures.append(future)
+        # Wait for all decryptions to complete
+        successful_decryptions = sum(await asyncio.gather(*jobs))
 
-            # Wait for all updates to complete
-            for future in futures:
-                if future.result():
-                    successful_updates += 1
+        self.logger.info(f"Decryption completed. {successful_decryptions}/{len(enc_files)} files decrypted successfully")
+        return successful_decryptions
+
+    async def aupdatekeys_files(self, pattern: str = "*.enc.yaml", base_dir: Path | None = None) -> int:
+        """
+        Update keys for all encrypted files matching the pattern using asyncio subprocesses.
+
+        Args:
+            pattern: File pattern to match (default: *.enc.yaml)
+            base_dir: Base directory to search (default: current directory)
+
+        Returns:
+            Number of files successfully updated
+        """
+        enc_files = await asyncio.to_thread(self.find_files, pattern, base_dir)
+
+        if not enc_files:
+            self.logger.info(f"No files found matching pattern: {pattern}")
+            return 0
+
+        self.logger.info(f"Found {len(enc_files)} encrypted files to update keys")
+
+        for enc_file in enc_files:
+            self.logger.info(f"Updating keys: {enc_file}")
+
+        # Wait for all updates to complete
+        successful_updates = sum(await asyncio.gather(*(self._aupdatekeys_file(enc_file) for enc_file in enc_files)))
 
         self.logger.info(f"Key update completed. {successful_updates}/{len(enc_files)} files updated successfully")
         return successful_updates
 
-    def _yaml_to_env_format(self, yaml_content: str, section: str = "act") -> str:
-        """Convert YAML content to .env format for GitHub Actions."""
+    def _yaml_to_env_format(self, yaml_content: bytes | str, section: str = "act") -> tuple[str, list[str]]:
+        """
+        Convert YAML content to .env format for GitHub Actions.
+
+        Returns:
+            Tuple of (env_content: str, env_lines: list[str]) so callers can
+            inspect individual variables without re-splitting the content
+        """
         try:
-            data = yaml.safe_load(yaml_content)
+            data = yaml.load(yaml_content, Loader=_SafeLoader)  # nosec B506
             if not isinstance(data, dict):
                 raise ValueError("YAML content must be a dictionary")
 
-            env_lines = []
-
             # Extract the specified section (default: 'act')
             section_data = data.get(section, {})
             if not isinstance(section_data, dict):
                 self.logger.warning(f"Section '{section}' not found or not a dictionary, using entire document")
                 section_data = data
 
+            # Fast path: the typical section is a flat mapping of scalars
+            if all(isinstance(value, str | int | float | bool) for value in section_data.values()):
+                env_lines = [f"{key.upper()}={_maybe_quote(str(value))}" for key, value in section_data.items()]
+                return "\n".join(env_lines), env_lines
+
             # Convert to env format
+            env_lines = []
             for key, value in section_data.items():
                 # Convert key to uppercase
                 env_key = key.upper()
@@ -426,18 +951,13 @@ class SOPSWrapper:
                     env_value = str(value)
                 elif isinstance(value, list | dict):
                     # For complex types, convert to JSON string
-                    import json
                     env_value = json.dumps(value)
                 else:
                     env_value = str(value)
 
-                # Quote values that contain spaces or special characters
-                if " " in env_value or any(char in env_value for char in ['"', "'", "$", "`", "\\"]):
-                    env_value = f'"{env_value}"'
-
-                env_lines.append(f"{env_key}={env_value}")
+                env_lines.append(f"{env_key}={_maybe_quote(env_value)}")
 
-            return "\n".join(env_lines)
+            return "\n".join(env_lines), env_lines
 
         except yaml.YAMLError as e:
             raise ValueError(f"Invalid YAML content: {e}")
@@ -465,11 +985,11 @@ class SOPSWrapper:
             # Decrypt the SOPS file
             self.logger.info(f"Decrypting: {enc_file}")
             result = subprocess.run([
-                "sops", "-d", str(enc_file)
-            ], capture_output=True, text=True, timeout=60)
+                _sops_executable(), "-d", str(enc_file)
+            ], capture_output=True, timeout=60)
 
             if result.returncode != 0:
-                self.logger.error(f"Failed to decrypt {enc_file}: {result.stderr}")
+                self.logger.error(f"Failed to decrypt {enc_file}: {result.stderr.decode(errors='replace')}")
                 return False
 
             decrypted_content = result.stdout
@@ -477,7 +997,7 @@ class SOPSWrapper:
 
             # Convert YAML to .env format
             self.logger.info("Converting to .env format...")
-            env_content = self._yaml_to_env_format(decrypted_content, "act")
+            env_content, env_lines = self._yaml_to_env_format(decrypted_content, "act")
 
             # Create output directory if it doesn't exist
             output_path = Path(output_file)
@@ -491,7 +1011,7 @@ class SOPSWrapper:
             output_path.chmod(0o600)
 
             # Count variables for reporting
-            var_count = len([line for line in env_content.split("\n") if line.strip() and "=" in line])
+            var_count = len(env_lines)
 
             self.logger.info(f"✅ Successfully created {output_file}")
             self.logger.info(f"File contains {var_count} environment variables")
@@ -499,11 +1019,9 @@ class SOPSWrapper:
             # Show preview (keys only for security)
             if var_count > 0:
                 self.logger.info("Preview (keys only):")
-                lines = env_content.split("\n")[:5]
-                for line in lines:
-                    if line.strip() and "=" in line:
-                        key = line.split("=")[0]
-                        self.logger.info(f"  {key}=***")
+                for line in env_lines[:5]:
+                    key = line.split("=", 1)[0]
+                    self.logger.info(f"  {key}=***")
 
                 if var_count > 5:
                     self.logger.info(f"  ... and {var_count - 5} more variables")
@@ -518,7 +1036,9 @@ class SOPSWrapper:
             return False
 
     def cleanup(self):
-        """Clean up environment variables."""
+        """Shut down the worker pool and clean up environment variables."""
+        self._executor.shutdown(wait=True)
+
         if "AWS_PROFILE" in os.environ and os.environ["AWS_PROFILE"] == self.aws_profile:
             del os.environ["AWS_PROFILE"]
 
@@ -540,6 +1060,7 @@ Examples:
   %(prog)s decrypt --base-dir /path/to/secrets
   %(prog)s to-act --secrets-file secrets/prod/secrets.enc.yaml
   %(prog)s encrypt --max-workers 8   # Use 8 parallel workers
+  %(prog)s encrypt --asyncio          # Run SOPS via asyncio subprocesses
         """
     )
 
@@ -593,6 +1114,12 @@ Examples:
         help="Maximum number of parallel workers (default: 4)"
     )
 
+    parser.add_argument(
+        "--asyncio",
+        action="store_true",
+        help="Run SOPS as asyncio subprocesses instead of worker threads (encrypt, decrypt and updatekeys)"
+    )
+
     parser.add_argument(
         "--update-keys",
         action="store_true",
@@ -627,10 +1154,16 @@ Examples:
                 args.pattern = "*.enc.yaml"
 
         # Execute action
-        if args.action == "encrypt":
+        if args.action == "encrypt" and args.asyncio:
+            result = asyncio.run(sops.aencrypt_files(args.pattern, args.base_dir, args.update_keys))
+        elif args.action == "encrypt":
             result = sops.encrypt_files(args.pattern, args.base_dir, args.update_keys)
+        elif args.action == "decrypt" and args.asyncio:
+            result = asyncio.run(sops.adecrypt_files(args.pattern, args.base_dir))
         elif args.action == "decrypt":
             result = sops.decrypt_files(args.pattern, args.base_dir)
+        elif args.action == "updatekeys" and args.asyncio:
+            result = asyncio.run(sops.aupdatekeys_files(args.pattern, args.base_dir))
         elif args.action == "updatekeys":
             result = sops.updatekeys_files(args.pattern, args.base_dir)
         else:  # to-act
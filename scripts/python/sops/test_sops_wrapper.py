@@ -3,8 +3,11 @@
 Test suite for SOPS wrapper functionality.
 """
 
+import asyncio
 import os
+import subprocess
 import tempfile
+import threading
 import unittest
 from pathlib import Path
 from unittest.mock import Mock, patch
@@ -13,31 +16,40 @@ import yaml
 
 # Import the SOPS wrapper (assuming it's in the same directory)
 try:
+    import sops_wrapper
     from sops_wrapper import SOPSWrapper
 except ImportError:
     import sys
     sys.path.insert(0, str(Path(__file__).parent))
+    import sops_wrapper
     from sops_wrapper import SOPSWrapper
 
 
 class TestSOPSWrapper(unittest.TestCase):
     """Test cases for SOPS wrapper functionality."""
 
+    # Test YAML content shared by all tests; treat as read-only
+    TEST_CONTENT = {
+        "secrets": {
+            "database_password": "super_secret_password",
+            "api_key": "test_api_key_12345"
+        },
+        "config": {
+            "environment": "test"
+        }
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        """Serialize the shared test content once for every test file."""
+        super().setUpClass()
+        cls.test_yaml_bytes = yaml.safe_dump(cls.TEST_CONTENT).encode("utf-8")
+
     def setUp(self):
         """Set up test environment."""
         self.temp_dir = Path(tempfile.mkdtemp())
         self.test_aws_profile = "test-profile"
-
-        # Create test YAML content
-        self.test_yaml_content = {
-            "secrets": {
-                "database_password": "super_secret_password",
-                "api_key": "test_api_key_12345"
-            },
-            "config": {
-                "environment": "test"
-            }
-        }
+        self.test_yaml_content = self.TEST_CONTENT
 
         # Mock SOPS availability
         self.sops_available_patcher = patch("sops_wrapper.SOPSWrapper._check_sops_available")
@@ -56,8 +68,11 @@ class TestSOPSWrapper(unittest.TestCase):
     def create_test_file(self, filename: str, content: dict) -> Path:
         """Create a test YAML file with given content."""
         file_path = self.temp_dir / filename
-        with open(file_path, "w") as f:
-            yaml.safe_dump(content, f)
+        if content is self.TEST_CONTENT:
+            file_path.write_bytes(self.test_yaml_bytes)
+        else:
+            with open(file_path, "w") as f:
+                yaml.safe_dump(content, f)
         return file_path
 
     def create_empty_file(self, filename: str) -> Path:
@@ -73,6 +88,18 @@ class TestSOPSWrapper(unittest.TestCase):
         self.assertEqual(wrapper.max_workers, 4)
         self.assertEqual(os.environ.get("AWS_PROFILE"), self.test_aws_profile)
 
+    @patch("subprocess.run")
+    def test_sops_available_cached(self, mock_run):
+        """Test that the SOPS probe runs once per process."""
+        sops_wrapper._sops_available.cache_clear()
+        self.addCleanup(sops_wrapper._sops_available.cache_clear)
+        mock_run.return_value = Mock(returncode=0)
+
+        self.assertTrue(sops_wrapper._sops_available())
+        self.assertTrue(sops_wrapper._sops_available())
+
+        mock_run.assert_called_once()
+
     def test_is_file_not_empty(self):
         """Test file emptiness check."""
         wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
@@ -115,7 +142,8 @@ class TestSOPSWrapper(unittest.TestCase):
         test_file = self.create_test_file("test.yaml", self.test_yaml_content)
         hash1 = wrapper._get_file_hash(test_file)
         self.assertIsNotNone(hash1)
-        self.assertEqual(len(hash1), 64)  # SHA256 hex digest length
+        self.assertEqual(len(hash1), 64)  # 32-byte digest hex length
+        self.assertEqual(hash1, sops_wrapper._hash_bytes(test_file.read_bytes()))
 
         # Test with same content should produce same hash
         test_file2 = self.create_test_file("test2.yaml", self.test_yaml_content)
@@ -127,6 +155,21 @@ class TestSOPSWrapper(unittest.TestCase):
         hash3 = wrapper._get_file_hash(non_existent)
         self.assertIsNone(hash3)
 
+    def test_get_file_hash_cached(self):
+        """Test file hashes are reused until the file changes."""
+        wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
+        sops_wrapper._hash_file.cache_clear()
+
+        test_file = self.create_test_file("test.yaml", self.test_yaml_content)
+        hash1 = wrapper._get_file_hash(test_file)
+        with patch("builtins.open") as mock_open:
+            self.assertEqual(wrapper._get_file_hash(test_file), hash1)
+            mock_open.assert_not_called()
+
+        # Rewriting the file changes mtime/size, so it is hashed again
+        self.create_test_file("test.yaml", {"changed": True})
+        self.assertNotEqual(wrapper._get_file_hash(test_file), hash1)
+
     def test_should_encrypt_conditions(self):
         """Test encryption decision logic."""
         wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
@@ -152,11 +195,57 @@ class TestSOPSWrapper(unittest.TestCase):
         self.assertFalse(should_encrypt)
         self.assertEqual(reason, "source file is empty or invalid YAML")
 
+    def test_should_encrypt_encrypt_cache(self):
+        """Test the sidecar cache skips files unchanged since last encryption."""
+        wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
+
+        dec_file = self.create_test_file("secrets.dec.yaml", self.test_yaml_content)
+        enc_file = self.create_test_file("secrets.enc.yaml", {"encrypted": "content"})
+
+        # Record a successful encryption and persist the cache
+        wrapper._record_encryption(enc_file, wrapper._snapshot_source(dec_file))
+        wrapper._save_encrypt_caches()
+        cache_file = self.temp_dir / ".sops-cache.json"
+        self.assertTrue(cache_file.exists())
+        self.assertEqual(cache_file.stat().st_mode & 0o777, 0o600)
+        # The sidecar must not carry anything derived from the plaintext
+        self.assertNotIn("plain_hash", cache_file.read_text())
+
+        # Test: Cache hit from a fresh wrapper reading the sidecar file
+        wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
+        should_encrypt, reason = wrapper._should_encrypt(dec_file, enc_file)
+        self.assertFalse(should_encrypt)
+        self.assertEqual(reason, "unchanged since last encryption")
+
+        # Test: Changed source content is not a cache hit
+        self.create_test_file("secrets.dec.yaml", {"secrets": {"api_key": "rotated"}})
+        self.assertFalse(wrapper._matches_encrypt_cache(dec_file, enc_file))
+
+    @patch("subprocess.run")
+    def test_expensive_verify(self, mock_run):
+        """Test content comparison against decrypted SOPS output."""
+        wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
+
+        dec_file = self.create_test_file("secrets.dec.yaml", self.test_yaml_content)
+        enc_file = self.create_test_file("secrets.enc.yaml", {"encrypted": "content"})
+
+        # Test: Decrypted content matches source
+        mock_run.return_value = Mock(returncode=0, stdout=dec_file.read_bytes())
+        should_encrypt, reason = wrapper._expensive_verify(dec_file, enc_file)
+        self.assertFalse(should_encrypt)
+        self.assertEqual(reason, "no changes detected")
+
+        # Test: Decrypted content differs from source
+        mock_run.return_value = Mock(returncode=0, stdout=b"secrets: {}\n")
+        should_encrypt, reason = wrapper._expensive_verify(dec_file, enc_file)
+        self.assertTrue(should_encrypt)
+        self.assertEqual(reason, "content has changed")
+
     @patch("subprocess.run")
     def test_encrypt_file_success(self, mock_run):
         """Test successful file encryption."""
         # Mock successful SOPS encryption
-        mock_run.return_value = Mock(returncode=0, stdout="encrypted_content")
+        mock_run.return_value = Mock(returncode=0, stdout=b"encrypted_content")
 
         wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
 
@@ -173,7 +262,7 @@ class TestSOPSWrapper(unittest.TestCase):
     def test_encrypt_file_failure(self, mock_run):
         """Test failed file encryption."""
         # Mock failed SOPS encryption
-        mock_run.return_value = Mock(returncode=1, stderr="encryption error")
+        mock_run.return_value = Mock(returncode=1, stderr=b"encryption error")
 
         wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
 
@@ -189,7 +278,7 @@ class TestSOPSWrapper(unittest.TestCase):
     def test_decrypt_file_success(self, mock_run):
         """Test successful file decryption."""
         # Mock successful SOPS decryption
-        decrypted_yaml = yaml.safe_dump(self.test_yaml_content)
+        decrypted_yaml = yaml.safe_dump(self.test_yaml_content).encode("utf-8")
         mock_run.return_value = Mock(returncode=0, stdout=decrypted_yaml)
 
         wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
@@ -207,7 +296,7 @@ class TestSOPSWrapper(unittest.TestCase):
     def test_decrypt_file_failure(self, mock_run):
         """Test failed file decryption."""
         # Mock failed SOPS decryption
-        mock_run.return_value = Mock(returncode=1, stderr="decryption error")
+        mock_run.return_value = Mock(returncode=1, stderr=b"decryption error")
 
         wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
 
@@ -239,8 +328,28 @@ class TestSOPSWrapper(unittest.TestCase):
         self.assertEqual(len(enc_files), 1)
         self.assertTrue(enc_files[0].name.endswith(".enc.yaml"))
 
+    def test_find_files_nested_pattern(self):
+        """Test file finding with directory patterns and skipped directories."""
+        wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
+
+        # Create test files in nested and skipped directories
+        (self.temp_dir / "env" / "ci").mkdir(parents=True)
+        (self.temp_dir / ".git").mkdir()
+        self.create_test_file("env/ci/secrets.dec.yaml", self.test_yaml_content)
+        self.create_test_file("env/secrets.dec.yaml", self.test_yaml_content)
+        self.create_test_file(".git/secrets.dec.yaml", self.test_yaml_content)
+
+        # Directory components must match the trailing parents
+        ci_files = wrapper.find_files("ci/*.dec.yaml", self.temp_dir)
+        self.assertEqual(ci_files, [self.temp_dir / "env" / "ci" / "secrets.dec.yaml"])
+
+        # Skipped directories are never searched
+        dec_files = wrapper.find_files("*.dec.yaml", self.temp_dir)
+        self.assertEqual(len(dec_files), 2)
+        self.assertNotIn(".git", [part for f in dec_files for part in f.parts])
+
     @patch("sops_wrapper.SOPSWrapper._encrypt_file")
-    @patch("sops_wrapper.SOPSWrapper._should_encrypt")
+    @patch("sops_wrapper.SOPSWrapper._cheap_should_encrypt")
     def test_encrypt_files(self, mock_should_encrypt, mock_encrypt_file):
         """Test batch file encryption."""
         # Mock encryption decision and execution
@@ -258,6 +367,66 @@ class TestSOPSWrapper(unittest.TestCase):
         self.assertEqual(result, 2)
         self.assertEqual(mock_encrypt_file.call_count, 2)
 
+    @patch("sops_wrapper.SOPSWrapper._encrypt_file")
+    @patch("sops_wrapper.SOPSWrapper._cheap_should_encrypt")
+    def test_encrypt_files_runs_concurrently(self, mock_should_encrypt, mock_encrypt_file):
+        """Test batch encryption overlaps SOPS runs on the worker pool."""
+        mock_should_encrypt.return_value = (True, "test reason")
+
+        # Each encryption waits for the other; serial execution would time out
+        barrier = threading.Barrier(2, timeout=5)
+        mock_encrypt_file.side_effect = lambda *args: barrier.wait() is not None
+
+        wrapper = SOPSWrapper(aws_profile=self.test_aws_profile, max_workers=2)
+        self.addCleanup(wrapper.cleanup)
+
+        self.create_test_file("secrets1.dec.yaml", self.test_yaml_content)
+        self.create_test_file("secrets2.dec.yaml", self.test_yaml_content)
+
+        result = wrapper.encrypt_files("*.dec.yaml", self.temp_dir)
+
+        self.assertEqual(result, 2)
+
+    @patch("sops_wrapper.SOPSWrapper._encrypt_file")
+    @patch("sops_wrapper.SOPSWrapper._expensive_verify")
+    @patch("sops_wrapper.SOPSWrapper._cheap_should_encrypt")
+    def test_encrypt_files_verifies_undecided(self, mock_cheap, mock_verify, mock_encrypt_file):
+        """Test batch encryption falls back to SOPS verification when needed."""
+        # Cheap checks can't decide, verification finds no changes
+        mock_cheap.return_value = (None, "content comparison required")
+        mock_verify.return_value = (False, "no changes detected")
+
+        wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
+
+        # Create test files
+        self.create_test_file("secrets1.dec.yaml", self.test_yaml_content)
+        self.create_test_file("secrets2.dec.yaml", self.test_yaml_content)
+
+        result = wrapper.encrypt_files("*.dec.yaml", self.temp_dir)
+
+        self.assertEqual(result, 0)
+        self.assertEqual(mock_verify.call_count, 2)
+        mock_encrypt_file.assert_not_called()
+
+    @patch("sops_wrapper.SOPSWrapper._arun_sops")
+    def test_aencrypt_files(self, mock_arun_sops):
+        """Test batch file encryption through asyncio subprocesses."""
+        # Mock successful SOPS encryption
+        mock_arun_sops.return_value = subprocess.CompletedProcess(["sops"], 0, b"encrypted_content", b"")
+
+        wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
+
+        # Create test files
+        self.create_test_file("secrets1.dec.yaml", self.test_yaml_content)
+        self.create_test_file("secrets2.dec.yaml", self.test_yaml_content)
+
+        result = asyncio.run(wrapper.aencrypt_files("*.dec.yaml", self.temp_dir))
+
+        self.assertEqual(result, 2)
+        self.assertEqual(mock_arun_sops.call_count, 2)
+        self.assertTrue((self.temp_dir / "secrets1.enc.yaml").exists())
+        self.assertTrue((self.temp_dir / "secrets2.enc.yaml").exists())
+
     @patch("sops_wrapper.SOPSWrapper._decrypt_file")
     def test_decrypt_files(self, mock_decrypt_file):
         """Test batch file decryption."""
@@ -275,6 +444,41 @@ class TestSOPSWrapper(unittest.TestCase):
         self.assertEqual(result, 2)
         self.assertEqual(mock_decrypt_file.call_count, 2)
 
+    @patch("sops_wrapper.SOPSWrapper._arun_sops")
+    def test_adecrypt_files(self, mock_arun_sops):
+        """Test batch file decryption through asyncio subprocesses."""
+        # Mock successful SOPS decryption
+        mock_arun_sops.return_value = subprocess.CompletedProcess(["sops"], 0, self.test_yaml_bytes, b"")
+
+        wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
+
+        # Create test files
+        self.create_test_file("secrets1.enc.yaml", {"encrypted": "content1"})
+        self.create_test_file("secrets2.enc.yaml", {"encrypted": "content2"})
+
+        result = asyncio.run(wrapper.adecrypt_files("*.enc.yaml", self.temp_dir))
+
+        self.assertEqual(result, 2)
+        self.assertEqual(mock_arun_sops.call_count, 2)
+        self.assertEqual((self.temp_dir / "secrets1.dec.yaml").read_bytes(), self.test_yaml_bytes)
+        self.assertEqual((self.temp_dir / "secrets2.dec.yaml").read_bytes(), self.test_yaml_bytes)
+
+    def test_yaml_to_env_format(self):
+        """Test .env conversion for flat and nested sections."""
+        wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
+
+        flat = yaml.safe_dump({"act": {"token": "abc", "port": 8080, "greeting": "hello world"}})
+        self.assertEqual(
+            wrapper._yaml_to_env_format(flat.encode("utf-8")),
+            ('GREETING="hello world"\nPORT=8080\nTOKEN=abc', ['GREETING="hello world"', "PORT=8080", "TOKEN=abc"]),
+        )
+
+        nested = yaml.safe_dump({"act": {"token": "abc", "hosts": ["a", "b"], "empty": None}})
+        self.assertEqual(
+            wrapper._yaml_to_env_format(nested)[0],
+            'EMPTY=None\nHOSTS="["a", "b"]"\nTOKEN=abc',
+        )
+
     def test_cleanup(self):
         """Test environment cleanup."""
         wrapper = SOPSWrapper(aws_profile=self.test_aws_profile)
@@ -0,0 +1,19 @@
+import os
+
+import pytest
+
+
+def pytest_configure(config):
+    # Fail the session up front instead of from a test on every worker
+    if os.getenv("REQUIRED_SETTING") is None:
+        raise pytest.UsageError(
+            'Environment setting "REQUIRED_SETTING" was not found. '
+            "Set REQUIRED_SETTING to any value for the tests to run."
+        )
+
+    # Smoke-import the deployment entry points once for the whole session
+    import testapp.asgi
+    import testapp.wsgi
+
+    assert testapp.wsgi.application is not None
+    assert testapp.asgi.application is not None
@@ -0,0 +1,16 @@
+import logging
+
+from django.apps import AppConfig
+
+from testapp.handlers import start_queue_listener
+
+
+class TestappConfig(AppConfig):
+    name = "testapp"
+
+    def ready(self):
+        # Log records are queued by request threads and written by a
+        # background listener; start it once logging has been configured
+        queue_handler = logging.getHandlerByName("queue")
+        if queue_handler is not None and getattr(queue_handler, "listener", None) is not None:
+            start_queue_listener(queue_handler)
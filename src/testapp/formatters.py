@@ -0,0 +1,46 @@
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+from pythonjsonlogger.jsonlogger import JsonFormatter
+
+
+class OrjsonFormatter(JsonFormatter):
+    """
+    JSON log formatter that serializes records with orjson when available.
+
+    Record fields are assembled exactly as by JsonFormatter; only the final
+    serialization step is swapped for orjson's C encoder. Types orjson does not
+    know go through the formatter's usual json_default/json_encoder fallback.
+    Records orjson rejects outright (such as integers wider than 64 bits), and
+    output that would differ from JsonFormatter's (json_indent set, or
+    non-ASCII text with json_ensure_ascii), are serialized by JsonFormatter
+    itself. Without orjson installed this behaves like JsonFormatter.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.json_default is not None:
+            self._orjson_default = self.json_default
+        elif self.json_encoder is not None:
+            self._orjson_default = self.json_encoder().default
+        else:
+            self._orjson_default = str
+
+    def jsonify_log_record(self, log_record):
+        """Returns a json string of the log record."""
+        if orjson is None or self.json_indent is not None:
+            return super().jsonify_log_record(log_record)
+        try:
+            serialized = orjson.dumps(
+                log_record, default=self._orjson_default, option=orjson.OPT_NON_STR_KEYS
+            ).decode()
+        except TypeError:
+            # orjson.JSONEncodeError is a TypeError; the stdlib encoder handles
+            # what orjson refuses, e.g. integers wider than 64 bits
+            return super().jsonify_log_record(log_record)
+        if self.json_ensure_ascii and not serialized.isascii():
+            # orjson always emits UTF-8; leave the \uXXXX escaping to json.dumps
+            return super().jsonify_log_record(log_record)
+        return serialized
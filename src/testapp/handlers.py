@@ -0,0 +1,64 @@
+import atexit
+import copy
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+_exception_formatter = logging.Formatter()
+
+
+class LocalQueueHandler(QueueHandler):
+    """
+    QueueHandler for a queue consumed by a listener in the same process.
+
+    The record is rendered on the logging thread, so later changes to its
+    arguments cannot leak into the output and argument __str__ methods never
+    run on the listener thread. Unlike the stock prepare(), the traceback is
+    kept as exc_text rather than folded into the message, so formatters still
+    report it separately.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if isinstance(record.msg, dict) and not record.args:
+            # Structured message for the JSON formatter; keep it a dict
+            record.msg = dict(record.msg)
+        else:
+            record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        # stack_info is already a string; formatters render it as it is
+        return record
+
+
+def start_queue_listener(handler):
+    """
+    Start handler's listener in this process and in every process forked from it.
+
+    Under gunicorn --preload or Celery's prefork pool the listener is started in
+    the parent; its thread does not survive fork, so each child gets a fresh
+    queue and listener of its own.
+    """
+    handler.listener.start()
+    atexit.register(_stop_queue_listener, handler)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=lambda: _restart_queue_listener(handler))
+
+
+def _restart_queue_listener(handler):
+    listener = handler.listener
+    # Records the parent had queued are written by the parent; start empty
+    handler.queue = queue.Queue()
+    handler.listener = QueueListener(
+        handler.queue, *listener.handlers, respect_handler_level=listener.respect_handler_level
+    )
+    handler.listener.start()
+
+
+def _stop_queue_listener(handler):
+    # Look the listener up at exit: a forked child replaces it
+    handler.listener.stop()
@@ -1,7 +1,78 @@
 import ipaddress
+import socket
+import struct
+from functools import lru_cache
 
 from django.http import HttpResponseForbidden
 
+HEALTH_PATH_PREFIX = "/health/"
+_HEALTH_PATH_PREFIX_LEN = len(HEALTH_PATH_PREFIX)
+
+# Decodes a packed IPv4 address into its integer value
+_unpack_ipv4 = struct.Struct("!I").unpack
+
+# (network, netmask) pairs of the default allow-list: 10/8, 172.16/12,
+# 192.168/16 and 127/8
+_PRIVATE_V4_RANGES = (
+    (0x0A000000, 0xFF000000),
+    (0xAC100000, 0xFFF00000),
+    (0xC0A80000, 0xFFFF0000),
+    (0x7F000000, 0xFF000000),
+)
+
+
+@lru_cache(maxsize=64)
+def _is_aws_health_checker(user_agent):
+    """
+    Check if user_agent belongs to an AWS load balancer or Route 53 health check.
+
+    AWS sends a small, fixed set of User-Agent strings, so after the first
+    probe the substring scan becomes a cache hit.
+    """
+    return "ELB-HealthChecker" in user_agent or "Amazon-Route53-Health-Check-Service" in user_agent
+
+
+def _in_ranges(ip_int, ranges):
+    """Check if ip_int matches any (network, netmask) pair, stopping at the first hit."""
+    for network, mask in ranges:  # noqa: SIM110 - plain loop avoids any()'s generator per call
+        if (ip_int & mask) == network:
+            return True
+    return False
+
+
+@lru_cache(maxsize=1024)
+def _classify_ip(ip_str, v4_ranges, v6_ranges):
+    """
+    Check if ip_str falls within the given (network, netmask) integer ranges.
+
+    Pure function of its arguments, so repeated probes from the same load
+    balancer nodes are answered from the cache.
+    """
+    # inet_pton rather than inet_aton: the latter also accepts shorthand such
+    # as "10.1", which ipaddress (and this check) rejects
+    try:
+        (ip_int,) = _unpack_ipv4(socket.inet_pton(socket.AF_INET, ip_str))
+        if v4_ranges is _PRIVATE_V4_RANGES:
+            # Default allow-list: unrolled into constant mask comparisons
+            return (
+                (ip_int & 0xFF000000) == 0x0A000000
+                or (ip_int & 0xFFF00000) == 0xAC100000
+                or (ip_int & 0xFFFF0000) == 0xC0A80000
+                or (ip_int & 0xFF000000) == 0x7F000000
+            )
+        return _in_ranges(ip_int, v4_ranges)
+    except (OSError, TypeError, ValueError):
+        # ValueError: inet_pton rejects strings with an embedded NUL
+        pass
+
+    try:
+        ip = ipaddress.ip_address(ip_str)
+    except (ValueError, ipaddress.AddressValueError):
+        # Invalid IP format - deny access
+        return False
+
+    return _in_ranges(int(ip), v4_ranges if ip.version == 4 else v6_ranges)
+
 
 class VPCHealthCheckMiddleware:
     """
@@ -14,31 +85,49 @@ class VPCHealthCheckMiddleware:
 
     def __init__(self, get_response):
         self.get_response = get_response
-        # VPC CIDR blocks - covers all private IP ranges
+        # VPC CIDR blocks - covers all private IP ranges. Ordered by how
+        # often they are seen: AWS VPCs mostly use 10/8, so it is tried first
         self.allowed_networks = [
             ipaddress.ip_network("10.0.0.0/8"),      # Private Class A
             ipaddress.ip_network("172.16.0.0/12"),   # Private Class B
             ipaddress.ip_network("192.168.0.0/16"),  # Private Class C
             ipaddress.ip_network("127.0.0.0/8"),     # Localhost
         ]
+        # Networks packed into (network, netmask) integer pairs for fast matching
+        self._v4_ranges = tuple(
+            (int(network.network_address), int(network.netmask))
+            for network in self.allowed_networks
+            if network.version == 4
+        )
+        if self._v4_ranges == _PRIVATE_V4_RANGES:
+            # Share the constant so _classify_ip can take its unrolled path
+            self._v4_ranges = _PRIVATE_V4_RANGES
+        self._v6_ranges = tuple(
+            (int(network.network_address), int(network.netmask))
+            for network in self.allowed_networks
+            if network.version == 6
+        )
 
     def __call__(self, request):
-        if request.path.startswith("/health/"):
-            # Allow health checks from AWS load balancer (User-Agent check)
-            user_agent = request.META.get("HTTP_USER_AGENT", "")
-            if "ELB-HealthChecker" in user_agent or "Amazon-Route53-Health-Check-Service" in user_agent:
-                return self.get_response(request)
-
-            # Allow health checks from AWS ALB target group health checks
-            # These come from AWS infrastructure and should be allowed
-            x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR", "")
-            if x_forwarded_for:
-                # If request comes through load balancer, allow it
-                return self.get_response(request)
-
-            client_ip = self.get_client_ip(request)
-            if not self.is_allowed_ip(client_ip):
-                return HttpResponseForbidden("Health check access denied - VPC only")
+        # Fast path: almost all traffic is not a health check; a slice
+        # comparison avoids the startswith method dispatch
+        if request.path[:_HEALTH_PATH_PREFIX_LEN] != HEALTH_PATH_PREFIX:
+            return self.get_response(request)
+
+        # Allow health checks from AWS load balancer (User-Agent check)
+        if _is_aws_health_checker(request.META.get("HTTP_USER_AGENT", "")):
+            return self.get_response(request)
+
+        # Allow health checks from AWS ALB target group health checks
+        # These come from AWS infrastructure and should be allowed
+        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR", "")
+        if x_forwarded_for:
+            # If request comes through load balancer, allow it
+            return self.get_response(request)
+
+        client_ip = self.get_client_ip(request)
+        if not self.is_allowed_ip(client_ip):
+            return HttpResponseForbidden("Health check access denied - VPC only")
 
         return self.get_response(request)
 
@@ -58,10 +147,13 @@ class VPCHealthCheckMiddleware:
     def is_allowed_ip(self, ip_str):
         """
         Check if the given IP address is within allowed private networks.
+
+        Dotted-quad IPv4 addresses are matched with integer masks against the
+        precomputed ranges; anything else goes through ipaddress parsing.
+        Decisions are memoized per IP string and range set.
         """
         try:
-            ip = ipaddress.ip_address(ip_str)
-            return any(ip in network for network in self.allowed_networks)
-        except (ValueError, ipaddress.AddressValueError):
-            # Invalid IP format - deny access
+            return _classify_ip(ip_str, self._v4_ranges, self._v6_ranges)
+        except TypeError:
+            # Unhashable input cannot be an IP address
             return False
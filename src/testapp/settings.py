@@ -19,6 +19,12 @@ from pathlib import Path
 import environ
 import yaml
 
+# Prefer the LibYAML-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
 logger = logging.getLogger(__name__)
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +49,8 @@ env = environ.Env(
     # Cache and session settings
     SESSION_COOKIE_SECURE=(bool, False),
     CSRF_COOKIE_SECURE=(bool, False),
+    # Disable when the load balancer already restricts /health/ access
+    ENABLE_HEALTH_VPC_GUARD=(bool, True),
     # Email settings
     EMAIL_URL=(str, "console://"),
     DEFAULT_FROM_EMAIL=(str, "noreply@elio.eti.br"),
@@ -56,6 +64,15 @@ env = environ.Env(
 # Read environment variables from .env file if it exists
 environ.Env.read_env(ROOT_DIR / ".env")
 
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = env("DEBUG")
+
+# Values used by more than one setting below are read from the environment once
+redis_url = env("REDIS_URL")
+# Upper bound on connections for each Redis pool the process opens (cache, Celery)
+redis_max_connections = 20
+cors_allowed_origins = env("CORS_ALLOWED_ORIGINS")
+
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = env("SECRET_KEY", default="")
 
@@ -64,7 +81,7 @@ if not SECRET_KEY:
     secrets_file = env("SECRETS_FILE", default="")
     if secrets_file and Path(secrets_file).exists():
         try:
-            secrets_data = yaml.safe_load(Path(secrets_file).read_text())
+            secrets_data = yaml.load(Path(secrets_file).read_text(), Loader=_SafeLoader)  # nosec B506
             SECRET_KEY = secrets_data.get("secret_key", "")
         except Exception as e:  # nosec B110
             # Expected: YAML parsing might fail if file is corrupted
@@ -89,14 +106,11 @@ if not SECRET_KEY:
             logger.debug(f"Failed to read AWS secrets from {aws_secret_name}: {e}")
 
 if not SECRET_KEY:
-    if env("DEBUG"):
+    if DEBUG:
         SECRET_KEY = "django-insecure-fallback-key-for-development-only"  # nosec B105
     else:
         raise ValueError("SECRET_KEY must be provided via environment variable, SECRETS_FILE, or AWS_SECRET_NAME")
 
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = env("DEBUG")
-
 ALLOWED_HOSTS = env("ALLOWED_HOSTS")
 
 # Environment detection
@@ -131,22 +145,20 @@ LOCAL_APPS = [
     "testapp",
 ]
 
-INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
+# Development-only apps, when installed
+DEV_APPS = [app for app in ("django_extensions", "debug_toolbar") if DEBUG and find_spec(app)]
 
-# Development-only apps
-if DEBUG:
-    if find_spec("django_extensions"):
-        INSTALLED_APPS.append("django_extensions")
-
-    if find_spec("debug_toolbar"):
-        INSTALLED_APPS.append("debug_toolbar")
+INSTALLED_APPS = [*DJANGO_APPS, *THIRD_PARTY_APPS, *LOCAL_APPS, *DEV_APPS]
 
 SITE_ID = 1
 
 MIDDLEWARE = [
+    # Development middleware
+    *(["debug_toolbar.middleware.DebugToolbarMiddleware"] if "debug_toolbar" in DEV_APPS else []),
     "django.middleware.security.SecurityMiddleware",
-    # VPC-only health check access control
-    "testapp.middleware.VPCHealthCheckMiddleware",
+    # VPC-only health check access control, placed right after SecurityMiddleware
+    # so denied probes are rejected before sessions, CSRF or auth do any work
+    *(["testapp.middleware.VPCHealthCheckMiddleware"] if env("ENABLE_HEALTH_VPC_GUARD") else []),
     # Whitenoise for static files in production
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -158,10 +170,6 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-# Development middleware
-if DEBUG:
-    MIDDLEWARE.insert(0, "debug_toolbar.middleware.DebugToolbarMiddleware")
-
 ROOT_URLCONF = "testapp.urls"
 
 TEMPLATES = [
@@ -183,35 +191,53 @@ TEMPLATES = [
 WSGI_APPLICATION = "testapp.wsgi.application"
 ASGI_APPLICATION = "testapp.asgi.application"
 
-# Database
+# Database and cache
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-DATABASES = {"default": env.db("DATABASE_URL")}
+# Test runs get their backends here directly, so the configured database and
+# Redis cache are never resolved for them
+if IS_TESTING:
+    # Use in-memory database for tests
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+            # Pin the test database in memory too, so it is never a file on disk
+            "TEST": {"NAME": ":memory:"},
+        }
+    }
 
-# Connection pooling for production
-if IS_PRODUCTION:
-    DATABASES["default"]["CONN_MAX_AGE"] = 60
-    DATABASES["default"]["OPTIONS"] = {
-        "MAX_CONNS": 20,
-        "MIN_CONNS": 5,
+    # Use dummy cache for tests
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+        }
     }
+else:
+    DATABASES = {"default": env.db("DATABASE_URL")}
+
+    # Connection pooling for production
+    if IS_PRODUCTION:
+        DATABASES["default"]["CONN_MAX_AGE"] = 60
+        DATABASES["default"]["OPTIONS"] = {
+            "MAX_CONNS": 20,
+            "MIN_CONNS": 5,
+        }
 
-# Redis Cache Configuration
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.redis.RedisCache",
-        "LOCATION": env("REDIS_URL"),
-        "OPTIONS": {
-            # Django 5.2+ built-in Redis backend uses different options
-            "connection_pool_kwargs": {
+    # Redis Cache Configuration
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": redis_url,
+            "OPTIONS": {
+                # Django's built-in Redis backend passes OPTIONS straight to
+                # redis.ConnectionPool.from_url, so pool settings go at this level
+                "max_connections": redis_max_connections,
                 "retry_on_timeout": True,
-                "retry_on_error": True,
-                "max_connections": 20,
             },
-        },
-        "KEY_PREFIX": "testapp",
-        "TIMEOUT": 300,
+            "KEY_PREFIX": "testapp",
+            "TIMEOUT": 300,
+        }
     }
-}
 
 # Session configuration
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
@@ -225,7 +251,7 @@ SESSION_COOKIE_SAMESITE = "Lax"
 CSRF_COOKIE_SECURE = env("CSRF_COOKIE_SECURE")
 CSRF_COOKIE_HTTPONLY = True
 CSRF_COOKIE_SAMESITE = "Lax"
-CSRF_TRUSTED_ORIGINS = env("CORS_ALLOWED_ORIGINS")
+CSRF_TRUSTED_ORIGINS = list(cors_allowed_origins)
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -335,7 +361,7 @@ SPECTACULAR_SETTINGS = {
 }
 
 # CORS configuration
-CORS_ALLOWED_ORIGINS = env("CORS_ALLOWED_ORIGINS")
+CORS_ALLOWED_ORIGINS = cors_allowed_origins
 CORS_ALLOW_CREDENTIALS = True
 CORS_PREFLIGHT_MAX_AGE = 86400
 
@@ -402,17 +428,21 @@ DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL")
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 
 # Celery configuration
-CELERY_BROKER_URL = env("REDIS_URL")
-CELERY_RESULT_BACKEND = env("REDIS_URL")
+CELERY_BROKER_URL = redis_url
+CELERY_RESULT_BACKEND = redis_url
+# Kombu keeps its own broker pool; cap it and the result backend pool like the cache
+CELERY_BROKER_POOL_LIMIT = 10
+CELERY_REDIS_MAX_CONNECTIONS = redis_max_connections
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 
-# Create logs directory if it doesn't exist
+# Create logs directory if it doesn't exist; test runs never write logs to disk
 log_dir = BASE_DIR / "logs"
-log_dir.mkdir(exist_ok=True)
+if not IS_TESTING:
+    log_dir.mkdir(exist_ok=True)
 
 # Logging configuration
 LOGGING = {
@@ -428,7 +458,7 @@ LOGGING = {
             "style": "{",
         },
         "json": {
-            "()": "pythonjsonlogger.jsonlogger.JsonFormatter",
+            "()": "testapp.formatters.OrjsonFormatter",
             "format": "%(levelname)s %(asctime)s %(module)s %(process)d %(thread)d %(message)s",
         },
     },
@@ -436,22 +466,29 @@ LOGGING = {
         "console": {
             "class": "logging.StreamHandler",
             "formatter": "verbose" if DEBUG else "json",
-        }
+        },
+        # Request threads only enqueue records; the listener started in
+        # TestappConfig.ready() formats and writes them off the request path
+        "queue": {
+            "class": "testapp.handlers.LocalQueueHandler",
+            "handlers": ["console"],
+            "respect_handler_level": True,
+        },
     },
     "loggers": {
         "django": {
-            "handlers": ["console"] if not IS_TESTING else ["console"],
+            "handlers": ["queue"] if not IS_TESTING else ["console"],
             "level": "INFO",
         },
         "testapp": {
-            "handlers": ["console"] if not IS_TESTING else ["console"],
+            "handlers": ["queue"] if not IS_TESTING else ["console"],
             "level": "DEBUG" if DEBUG else "INFO",
             "propagate": False,
         },
     },
     "root": {
         "level": "INFO",
-        "handlers": ["console"],
+        "handlers": ["queue"] if not IS_TESTING else ["console"],
     },
 }
 
@@ -499,17 +536,12 @@ if DEBUG:
     SHELL_PLUS_PRINT_SQL = True
     SHELL_PLUS_SQLPARSE_ENABLED = True
 
-    # Disable caching in development
-    CACHES["default"]["TIMEOUT"] = 1
+    # Disable caching in development (test runs already use the dummy cache)
+    if not IS_TESTING:
+        CACHES["default"]["TIMEOUT"] = 1
 
 # Testing settings
 if IS_TESTING:
-    # Use in-memory database for tests
-    DATABASES["default"] = {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": ":memory:",
-    }
-
     # Disable migrations for faster tests
     class DisableMigrations:
         def __contains__(self, item):
@@ -520,13 +552,6 @@ if IS_TESTING:
 
     MIGRATION_MODULES = DisableMigrations()
 
-    # Use dummy cache for tests
-    CACHES = {
-        "default": {
-            "BACKEND": "django.core.cache.backends.dummy.DummyCache",
-        }
-    }
-
     # Disable Celery in tests
     CELERY_TASK_ALWAYS_EAGER = True
     CELERY_TASK_EAGER_PROPAGATES = True
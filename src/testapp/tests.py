@@ -1,12 +1,47 @@
+import json
+import logging
 import os
-from unittest.mock import patch
+import queue
+import sys
+import tempfile
+import warnings
+from datetime import UTC, datetime
+from functools import cache
+from logging.handlers import QueueListener
+from pathlib import Path
+from unittest import skipUnless
 
 from django.conf import settings
-from django.test import Client, TestCase
-from django.urls import reverse
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase
+from django.urls import resolve, reverse_lazy
+from django.utils.functional import empty
+from pythonjsonlogger.jsonlogger import JsonFormatter
 
+from testapp.formatters import OrjsonFormatter
+from testapp.handlers import LocalQueueHandler, start_queue_listener
+from testapp.middleware import VPCHealthCheckMiddleware
 
-class EnvironmentTestCase(TestCase):
+# Module-level URLs for the view tests; lazy so importing this module does
+# not load the URLconf
+HELLO_URL = reverse_lazy("hello_world")
+HEALTH_URL = reverse_lazy("health_check")
+
+
+@cache
+def shared_client():
+    """
+    Return the test Client shared by the whole run.
+
+    The handler's middleware chain is loaded once here and reused by every
+    request. Only for tests that neither log in nor touch the session.
+    """
+    client = Client()
+    client.handler.load_middleware()
+    return client
+
+
+class EnvironmentTestCase(SimpleTestCase):
     def test_required_setting(self):
         """Test that REQUIRED_SETTING environment variable is set"""
         required_setting = os.getenv("REQUIRED_SETTING", None)
@@ -17,115 +52,270 @@ class EnvironmentTestCase(TestCase):
         )
 
 
-class ViewTestCase(TestCase):
-    def setUp(self):
-        self.client = Client()
+class ViewTestCase(SimpleTestCase):
+    client_class = staticmethod(shared_client)
 
     def test_hello_world_view(self):
         """Test hello_world view returns correct response"""
-        response = self.client.get(reverse("hello_world"))
+        response = self.client.get(HELLO_URL)
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.content.decode(), "Hello World")
+        self.assertEqual(response.content, b"Hello World")
 
     def test_health_check_view(self):
         """Test health_check view returns correct response"""
-        response = self.client.get(reverse("health_check"))
+        response = self.client.get(HEALTH_URL)
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.content.decode(), "OK")
+        self.assertEqual(response.content, b"OK")
+
+
+class VPCHealthCheckMiddlewareTestCase(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = VPCHealthCheckMiddleware(lambda request: HttpResponse("OK"))
+
+    def test_is_allowed_ip_private_ranges(self):
+        """Test private and loopback IPv4 addresses are allowed"""
+        from testapp.middleware import _PRIVATE_V4_RANGES
+
+        self.assertIs(self.middleware._v4_ranges, _PRIVATE_V4_RANGES)
+        for ip in ("10.1.2.3", "172.16.0.1", "172.31.255.255", "192.168.1.1", "127.0.0.1"):
+            self.assertTrue(self.middleware.is_allowed_ip(ip), ip)
+
+    def test_is_allowed_ip_rejects_public_and_invalid(self):
+        """Test public, IPv6 and malformed addresses are denied"""
+        for ip in ("8.8.8.8", "172.32.0.1", "11.0.0.1", "::1", "010.0.0.1", "10.0.0", "", "not-an-ip"):
+            self.assertFalse(self.middleware.is_allowed_ip(ip), ip)
+
+    def test_is_allowed_ip_rejects_embedded_nul(self):
+        """Test addresses with an embedded NUL are denied rather than raising"""
+        request = self.factory.get("/health/", HTTP_X_FORWARDED_FOR="10.0.0.1\x00, 8.8.8.8")
+        client_ip = self.middleware.get_client_ip(request)
+        self.assertEqual(client_ip, "10.0.0.1\x00")
+        self.assertFalse(self.middleware.is_allowed_ip(client_ip))
+        self.assertFalse(self.middleware.is_allowed_ip("1.2.3.4\x00"))
+
+    def test_is_allowed_ip_custom_networks(self):
+        """Test a modified allow-list is matched through the generic range check"""
+        self.middleware._v4_ranges = ((0x08080800, 0xFFFFFF00),)
+        self.assertTrue(self.middleware.is_allowed_ip("8.8.8.8"))
+        self.assertFalse(self.middleware.is_allowed_ip("10.1.2.3"))
+
+    def test_is_allowed_ip_cached(self):
+        """Test repeated lookups for the same IP are served from the cache"""
+        from testapp.middleware import _classify_ip
+
+        _classify_ip.cache_clear()
+        self.addCleanup(_classify_ip.cache_clear)
+        self.middleware.is_allowed_ip("10.0.0.1")
+        self.middleware.is_allowed_ip("10.0.0.1")
+        self.assertEqual(_classify_ip.cache_info().hits, 1)
+
+    def test_health_check_from_public_ip_denied(self):
+        """Test health check requests from outside the VPC are forbidden"""
+        request = self.factory.get("/health/", REMOTE_ADDR="8.8.8.8")
+        self.assertEqual(self.middleware(request).status_code, 403)
+
+    def test_health_check_from_private_ip_allowed(self):
+        """Test health check requests from inside the VPC are allowed"""
+        request = self.factory.get("/health/", REMOTE_ADDR="10.0.0.5")
+        self.assertEqual(self.middleware(request).status_code, 200)
+
+    def test_health_check_from_elb_allowed(self):
+        """Test health check requests from AWS load balancers are allowed"""
+        for user_agent in ("ELB-HealthChecker/2.0", "Amazon-Route53-Health-Check-Service (ref 1234)"):
+            request = self.factory.get("/health/", REMOTE_ADDR="8.8.8.8", HTTP_USER_AGENT=user_agent)
+            self.assertEqual(self.middleware(request).status_code, 200, user_agent)
+
+    def test_non_health_path_not_restricted(self):
+        """Test non health check paths are not restricted"""
+        for path in ("/", "/healthz/", "/api/health/"):
+            request = self.factory.get(path, REMOTE_ADDR="8.8.8.8")
+            self.assertEqual(self.middleware(request).status_code, 200, path)
+
+
+class QueueLoggingTestCase(SimpleTestCase):
+    def make_handler(self, stream):
+        target = logging.StreamHandler(stream)
+        target.setFormatter(OrjsonFormatter("%(levelname)s %(message)s"))
+        handler = LocalQueueHandler(queue.Queue())
+        handler.listener = QueueListener(handler.queue, target)
+        return handler
+
+    def test_queued_record_keeps_exc_info(self):
+        """Test records reach the formatter with their traceback reported separately"""
+        with tempfile.TemporaryFile("w+") as stream:
+            handler = self.make_handler(stream)
+            handler.listener.start()
+            try:
+                raise ValueError("boom")
+            except ValueError:
+                record = logging.LogRecord("testapp", logging.ERROR, __file__, 1, "failed", None, sys.exc_info())
+            handler.handle(record)
+            handler.listener.stop()
+
+            stream.seek(0)
+            data = json.loads(stream.read())
 
+        self.assertEqual(data["message"], "failed")
+        self.assertIn("ValueError: boom", data["exc_info"])
+
+    def test_queued_record_rendered_when_logged(self):
+        """Test arguments changed after the log call do not alter the message"""
+        with tempfile.TemporaryFile("w+") as stream:
+            handler = self.make_handler(stream)
+            state = ["before"]
+            handler.handle(logging.LogRecord("testapp", logging.INFO, __file__, 1, "state=%s", (state,), None))
+            state[0] = "after"
+
+            # Drain the queue only after the argument has changed
+            handler.listener.start()
+            handler.listener.stop()
+
+            stream.seek(0)
+            data = json.loads(stream.read())
+
+        self.assertEqual(data["message"], "state=['before']")
+
+    @skipUnless(hasattr(os, "fork"), "requires os.fork")
+    def test_records_logged_after_fork_are_written(self):
+        """Test a forked child gets its own running listener"""
+        with tempfile.TemporaryFile("w+") as stream:
+            handler = self.make_handler(stream)
+            start_queue_listener(handler)
+            self.addCleanup(handler.listener.stop)
+
+            stream.flush()
+            with warnings.catch_warnings(action="ignore", category=DeprecationWarning):
+                pid = os.fork()
+            if pid == 0:
+                try:
+                    handler.handle(logging.LogRecord("testapp", logging.INFO, __file__, 1, "from child", None, None))
+                    handler.listener.stop()
+                    stream.flush()
+                finally:
+                    os._exit(0)
+
+            os.waitpid(pid, 0)
+            stream.seek(0)
+            messages = [json.loads(line)["message"] for line in stream.read().splitlines()]
+
+        self.assertEqual(messages, ["from child"])
+
+
+class OrjsonFormatterTestCase(SimpleTestCase):
+    def test_format_produces_json(self):
+        """Test log records are serialized to JSON including extra fields"""
+        formatter = OrjsonFormatter("%(levelname)s %(message)s")
+        record = logging.LogRecord("testapp", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+        record.when = datetime(2025, 1, 1, tzinfo=UTC)
+        record.obj = object()
+
+        data = json.loads(formatter.format(record))
+
+        self.assertEqual(data["levelname"], "INFO")
+        self.assertEqual(data["message"], "hello world")
+        self.assertTrue(data["when"].startswith("2025-01-01T00:00:00"))
+        self.assertIn("object", data["obj"])
+
+    def test_format_falls_back_to_json_formatter(self):
+        """Test records orjson cannot match are serialized like JsonFormatter"""
+        record = logging.LogRecord("testapp", logging.INFO, __file__, 1, "café", None, None)
+        record.big = 2**70
+
+        for kwargs in ({}, {"json_indent": 2}, {"json_ensure_ascii": False}):
+            with self.subTest(**kwargs):
+                formatter = OrjsonFormatter("%(levelname)s %(message)s", **kwargs)
+                expected = JsonFormatter("%(levelname)s %(message)s", **kwargs).format(record)
+                self.assertEqual(formatter.format(record), expected)
+                self.assertEqual(json.loads(expected)["big"], 2**70)
+
+
+class UrlsTestCase(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root_match = resolve("/")
+        cls.health_match = resolve("/health/")
 
-class UrlsTestCase(TestCase):
     def test_root_url_resolves_to_hello_world(self):
         """Test root URL resolves to hello_world view"""
-        from django.urls import resolve
-        view = resolve("/")
-        self.assertEqual(view.func.__name__, "hello_world")
+        self.assertEqual(self.root_match.func.__name__, "hello_world")
 
     def test_health_url_resolves_to_health_check(self):
         """Test health URL resolves to health_check view"""
-        from django.urls import resolve
-        view = resolve("/health/")
-        self.assertEqual(view.func.__name__, "health_check")
-
+        self.assertEqual(self.health_match.func.__name__, "health_check")
 
-class WSGITestCase(TestCase):
-    def test_wsgi_application_import(self):
-        """Test WSGI application can be imported"""
-        from testapp.wsgi import application
-        self.assertIsNotNone(application)
 
+class WSGITestCase(SimpleTestCase):
     def test_wsgi_django_setup(self):
         """Test WSGI module sets up Django correctly"""
-        with patch("django.setup"), patch("os.environ.setdefault") as mock_setdefault:
-            # Import wsgi module to trigger its execution
-            import importlib
-
-            import testapp.wsgi
-            importlib.reload(testapp.wsgi)
+        import testapp.wsgi
 
-            mock_setdefault.assert_called_with("DJANGO_SETTINGS_MODULE", "testapp.settings")
+        # Check the module source rather than re-executing it
+        source = Path(testapp.wsgi.__file__).read_text()
+        self.assertIn('os.environ.setdefault("DJANGO_SETTINGS_MODULE", "testapp.settings")', source)
+        self.assertIn("application = get_wsgi_application()", source)
 
 
-class ASGITestCase(TestCase):
-    def test_asgi_application_import(self):
-        """Test ASGI application can be imported"""
-        from testapp.asgi import application
-        self.assertIsNotNone(application)
-
+class ASGITestCase(SimpleTestCase):
     def test_asgi_django_setup(self):
         """Test ASGI module sets up Django correctly"""
-        with patch("django.setup"), patch("os.environ.setdefault") as mock_setdefault:
-            # Import asgi module to trigger its execution
-            import importlib
-
-            import testapp.asgi
-            importlib.reload(testapp.asgi)
+        import testapp.asgi
 
-            mock_setdefault.assert_called_with("DJANGO_SETTINGS_MODULE", "testapp.settings")
+        # Check the module source rather than re-executing it
+        source = Path(testapp.asgi.__file__).read_text()
+        self.assertIn('os.environ.setdefault("DJANGO_SETTINGS_MODULE", "testapp.settings")', source)
+        self.assertIn("application = get_asgi_application()", source)
 
 
-class SettingsTestCase(TestCase):
-    def test_debug_setting_in_testing(self):
-        """Test DEBUG is False in testing environment"""
-        self.assertFalse(settings.DEBUG)
+# (setting, check) pairs verified by SettingsTestCase.test_settings
+SETTINGS_EXPECTATIONS = [
+    # DEBUG is off in the testing environment
+    ("DEBUG", lambda value: value is False),
+    ("SECRET_KEY", lambda value: value is not None and value != ""),
+    ("ALLOWED_HOSTS", lambda value: isinstance(value, list)),
+    ("INSTALLED_APPS", lambda value: isinstance(value, list) and "django.contrib.admin" in value),
+    (
+        "MIDDLEWARE",
+        lambda value: isinstance(value, list) and "django.middleware.security.SecurityMiddleware" in value,
+    ),
+    ("TIME_ZONE", lambda value: value == "UTC"),
+    ("LANGUAGE_CODE", lambda value: value == "en-us"),
+    ("STATIC_URL", lambda value: value == "/static/"),
+    ("LOGGING", lambda value: value.get("version") == 1),
+]
 
-    def test_secret_key_is_set(self):
-        """Test SECRET_KEY is configured"""
-        self.assertIsNotNone(settings.SECRET_KEY)
-        self.assertNotEqual(settings.SECRET_KEY, "")
 
-    def test_allowed_hosts_configured(self):
-        """Test ALLOWED_HOSTS is configured"""
-        self.assertIsInstance(settings.ALLOWED_HOSTS, list)
+class SettingsTestCase(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Read settings from the configured Settings object directly rather
+        # than through the LazySettings proxy on every access
+        if settings._wrapped is empty:
+            settings._setup()
+        cls.S = settings._wrapped
 
-    def test_installed_apps_configured(self):
-        """Test INSTALLED_APPS is configured"""
-        self.assertIsInstance(settings.INSTALLED_APPS, list)
-        self.assertIn("django.contrib.admin", settings.INSTALLED_APPS)
+    def test_settings(self):
+        """Test core settings are configured"""
+        for name, check in SETTINGS_EXPECTATIONS:
+            with self.subTest(name=name):
+                value = getattr(self.S, name)
+                self.assertTrue(check(value), f"{name}={value!r}")
 
-    def test_middleware_configured(self):
-        """Test MIDDLEWARE is configured"""
-        self.assertIsInstance(settings.MIDDLEWARE, list)
-        self.assertIn("django.middleware.security.SecurityMiddleware", settings.MIDDLEWARE)
+    def test_vpc_health_guard_enabled_by_default(self):
+        """Test VPC health check middleware runs right after SecurityMiddleware"""
+        index = self.S.MIDDLEWARE.index("django.middleware.security.SecurityMiddleware")
+        self.assertEqual(self.S.MIDDLEWARE[index + 1], "testapp.middleware.VPCHealthCheckMiddleware")
 
     def test_database_configuration(self):
         """Test database configuration"""
-        self.assertIn("default", settings.DATABASES)
-        self.assertEqual(settings.DATABASES["default"]["ENGINE"], "django.db.backends.sqlite3")
-
-    def test_timezone_setting(self):
-        """Test timezone is configured"""
-        self.assertEqual(settings.TIME_ZONE, "UTC")
-
-    def test_language_code_setting(self):
-        """Test language code is configured"""
-        self.assertEqual(settings.LANGUAGE_CODE, "en-us")
-
-    def test_static_url_setting(self):
-        """Test static URL is configured"""
-        self.assertEqual(settings.STATIC_URL, "/static/")
+        self.assertIn("default", self.S.DATABASES)
+        self.assertEqual(self.S.DATABASES["default"]["ENGINE"], "django.db.backends.sqlite3")
+        self.assertEqual(self.S.DATABASES["default"]["TEST"]["NAME"], ":memory:")
 
-    def test_logging_configuration(self):
-        """Test logging is configured"""
-        self.assertIn("version", settings.LOGGING)
-        self.assertEqual(settings.LOGGING["version"], 1)
+    def test_logging_queue_handler_configured(self):
+        """Test non-test logging goes through a QueueHandler feeding the console"""
+        queue_handler = self.S.LOGGING["handlers"]["queue"]
+        self.assertEqual(queue_handler["class"], "testapp.handlers.LocalQueueHandler")
+        self.assertEqual(queue_handler["handlers"], ["console"])
@@ -1,19 +1,26 @@
+from django.apps import apps
 from django.urls import path
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
 
 from .views import health_check, hello_world
 
 urlpatterns = [
     path("", hello_world, name="hello_world"),
     path("health/", health_check, name="health_check"),
-    # OpenAPI 3 schema
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
-    # Swagger UI
-    path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
-    # ReDoc UI
-    path("api/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
 ]
+
+# API documentation, only when drf-spectacular is installed
+if apps.is_installed("drf_spectacular"):
+    from drf_spectacular.views import (
+        SpectacularAPIView,
+        SpectacularRedocView,
+        SpectacularSwaggerView,
+    )
+
+    urlpatterns += [
+        # OpenAPI 3 schema
+        path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+        # Swagger UI
+        path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
+        # ReDoc UI
+        path("api/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
+    ]